@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import os, sys, subprocess, time, shutil
+import os, re, sys, logging, pwd, grp, subprocess, time, shutil, socket, functools, hashlib, tempfile, urllib.error, urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Sequence, Optional
 
+try:
+    import urllib3
+    from kubernetes import client as k8s_client, config as k8s_config, watch as k8s_watch
+    from kubernetes.client.exceptions import ApiException
+except ImportError:  # optional; readiness checks fall back to kubectl subprocesses
+    urllib3 = k8s_client = k8s_config = k8s_watch = ApiException = None
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # optional; file waits fall back to polling
+    INotify = inotify_flags = None
+
 # ================================================================
 # Single-node K3s cluster bootstrap
 # * Installs / verifies K3s
@@ -18,57 +31,141 @@ from typing import Sequence, Optional
 #   RancherDeployment -> helm install Rancher (https only)
 #   ClusterBanner     -> verification & final access banner
 
-# A lightweight logger is introduced for uniform, colorized output.
+# Logging goes through the stdlib `logging` module with a colorizing formatter.
+# BOOTSTRAP_QUIET=1 raises the level to WARNING so info calls return before formatting.
 
-class Log:
-    COLORS = {
-        'INFO': '\u001b[36m',      # cyan
-        'SUCCESS': '\u001b[32m',   # green
-        'WARN': '\u001b[33m',      # yellow
-        'ERROR': '\u001b[31m',     # red
-        'RESET': '\u001b[0m',
-        'SECTION': '\u001b[35m',   # magenta
-    }
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
 
-    @classmethod
-    def _stamp(cls, level: str, msg: str) -> str:
-        color = cls.COLORS.get(level, '')
-        reset = cls.COLORS['RESET']
-        return f"[{level}] {color}{msg}{reset}" if color else f"[{level}] {msg}"
+class ColorFormatter(logging.Formatter):
+    RESET = '\u001b[0m'
+    SECTION = '\u001b[35m'                       # magenta
+    LEVELS = {
+        logging.INFO: ('INFO', '\u001b[36m'),     # cyan
+        SUCCESS: ('SUCCESS', '\u001b[32m'),       # green
+        logging.WARNING: ('WARN', '\u001b[33m'),  # yellow
+        logging.ERROR: ('ERROR', '\u001b[31m'),   # red
+    }
 
-    @classmethod
-    def info(cls, msg: str):
-        print(cls._stamp('INFO', msg))
+    def __init__(self):
+        super().__init__()
+        # Per-level (prefix, suffix) pairs, built once instead of on every record.
+        self._fmt_pairs = {lvl: (f"[{name}] {color}", self.RESET) for lvl, (name, color) in self.LEVELS.items()}
+        bar = '=' * 64
+        self._section_pair = (f"{self.SECTION}{bar}\n", f"\n{bar}{self.RESET}")
 
-    @classmethod
-    def success(cls, msg: str):
-        print(cls._stamp('SUCCESS', msg))
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "section", False):
+            pre, post = self._section_pair
+        else:
+            pre, post = self._fmt_pairs.get(record.levelno, (f"[{record.levelname}] ", ""))
+        return pre + record.getMessage() + post
 
-    @classmethod
-    def warn(cls, msg: str):
-        print(cls._stamp('WARN', msg))
+log = logging.getLogger("bootstrap")
 
-    @classmethod
-    def error(cls, msg: str):
-        print(cls._stamp('ERROR', msg))
+def configure_logging():
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(ColorFormatter())
+    log.addHandler(handler)
+    log.setLevel(logging.WARNING if os.environ.get("BOOTSTRAP_QUIET") == "1" else logging.INFO)
+    log.propagate = False
 
-    @classmethod
-    def section(cls, title: str):
-        bar = '=' * 64
-        print(f"{cls.COLORS['SECTION']}{bar}\n{title}\n{bar}{cls.COLORS['RESET']}")
+def section(title: str):
+    log.info(title, extra={"section": True})
 
 def run(cmd: Sequence[str], *, check: bool = True, capture: bool = False,
         env: Optional[dict] = None, cwd: Optional[str] = None) -> subprocess.CompletedProcess:
     printable = " ".join(cmd)
-    Log.info(f"$ {printable}" + (f" (cwd={cwd})" if cwd else ""))
-    return subprocess.run(cmd, check=check, text=True, capture_output=capture, env=env, cwd=cwd)
+    log.info("$ %s%s", printable, f" (cwd={cwd})" if cwd else "")
+    # Output that goes straight to the terminal is never decoded; only captured output needs text mode.
+    kwargs = dict(text=True, capture_output=True) if capture else {}
+    return subprocess.run(cmd, check=check, env=env, cwd=cwd, **kwargs)
+
+def run_installer(url: str, interpreter: str, *, sha256_env: str, env: Optional[dict] = None,
+                  capture: bool = False) -> subprocess.CompletedProcess:
+    """Download an installer script and run it directly, without a login shell or curl pipe.
+
+    If the environment variable named by sha256_env is set, the download must match that digest.
+    With capture=True the installer's output is returned instead of written to the terminal.
+    """
+    log.info("Downloading %s", url)
+    try:
+        with urllib.request.urlopen(url, timeout=60) as r:
+            data = r.read()
+    except (urllib.error.URLError, OSError) as e:
+        log.error("Failed to download %s: %s", url, e)
+        sys.exit(2)
+    digest = hashlib.sha256(data).hexdigest()
+    expected = os.environ.get(sha256_env)
+    if expected and expected.strip().lower() != digest:
+        log.error("Checksum mismatch for %s: expected %s, got %s", url, expected, digest)
+        sys.exit(2)
+    log.info("sha256 %s%s", digest, "" if expected else f" (set {sha256_env} to pin)")
+    with tempfile.NamedTemporaryFile("wb", suffix=".sh", delete=False) as f:
+        f.write(data)
+    try:
+        return run([interpreter, f.name], check=True, env=env, capture=capture)
+    finally:
+        os.unlink(f.name)
+
+def _nonempty(path: Path) -> bool:
+    try:
+        return path.stat().st_size > 0
+    except FileNotFoundError:
+        return False
+
+def wait_for_file(path: Path, timeout_sec: int) -> bool:
+    """Block until path exists and is non-empty; uses inotify when available, otherwise polls every 2s.
+
+    k3s writes its kubeconfig in place rather than renaming it into position, so with inotify we
+    wake on CLOSE_WRITE (the writer finished) instead of CREATE (the file is still empty).
+    """
+    deadline = time.time() + timeout_sec
+    if INotify is not None and path.parent.is_dir():
+        with INotify() as ino:
+            ino.add_watch(str(path.parent), inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO)
+            # re-checked after add_watch so a write racing the watch setup is not missed
+            while not _nonempty(path):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                ino.read(timeout=int(remaining * 1000))
+            return True
+    while not _nonempty(path):
+        if time.time() >= deadline:
+            return False
+        time.sleep(2)
+    return True
+
+@functools.lru_cache(maxsize=None)
+def which(name: str) -> Optional[str]:
+    # PATH lookups are memoized; call which.cache_clear() after installing a binary.
+    return shutil.which(name)
+
+@functools.lru_cache(maxsize=None)
+def detect_primary_ip() -> str:
+    # UDP connect() only selects the outbound interface; no packet is sent.
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+
+@functools.lru_cache(maxsize=None)
+def detect_hostname() -> str:
+    return socket.gethostname()
 
 class HostEnv:
     def __init__(self):
         self.user = os.environ.get("SUDO_USER") or os.environ.get("USER") or "unknown"
         self.user_home = Path(f"/home/{self.user}") if self.user != "root" else Path("/root")
-        self.env = os.environ.copy()
-        self._primary_ip = self._detect_primary_ip()
+        self._primary_ip = detect_primary_ip()
+        self._kube_env = {**os.environ, "KUBECONFIG": str(self.kubeconfig_path)}
+        self._api_client = None
+        self._api_client_failed = False
+        self._core_api = None
+        self._apps_api = None
 
     @property
     def primary_ip(self) -> str:
@@ -78,53 +175,143 @@ class HostEnv:
     def kubeconfig_path(self) -> Path:
         return self.user_home / ".kube" / "config"
 
-    def _detect_primary_ip(self) -> str:
-        r = subprocess.run(["hostname", "-I"], text=True, capture_output=True, check=False)
-        parts = (r.stdout or "").split()
-        return parts[0] if parts else "127.0.0.1"
+    def api_client(self):
+        """Shared Kubernetes API client (one connection pool), or None if unavailable."""
+        if (self._api_client is None and not self._api_client_failed
+                and k8s_client is not None and self.kubeconfig_path.exists()):
+            cfg = k8s_client.Configuration()
+            try:
+                k8s_config.load_kube_config(config_file=str(self.kubeconfig_path), client_configuration=cfg)
+            except Exception as e:
+                log.warning("Could not load %s for the kubernetes client (%s); using kubectl.", self.kubeconfig_path, e)
+                self._api_client_failed = True
+                return None
+            cfg.connection_pool_maxsize = 50
+            cfg.retries = 3
+            self._api_client = k8s_client.ApiClient(cfg)
+        return self._api_client
+
+    @property
+    def core_api(self):
+        if self._core_api is None and (api := self.api_client()) is not None:
+            self._core_api = k8s_client.CoreV1Api(api)
+        return self._core_api
+
+    @property
+    def apps_api(self):
+        if self._apps_api is None and (api := self.api_client()) is not None:
+            self._apps_api = k8s_client.AppsV1Api(api)
+        return self._apps_api
+
+    def chown_to_user(self, path: Path, recursive: bool = False):
+        """`chown [-R] user:user path` via direct syscalls (symlinks are not followed)."""
+        uid = pwd.getpwnam(self.user).pw_uid
+        gid = grp.getgrnam(self.user).gr_gid
+        os.chown(path, uid, gid, follow_symlinks=False)
+        if recursive:
+            for dirpath, dirnames, filenames in os.walk(path):
+                for name in dirnames + filenames:
+                    os.chown(os.path.join(dirpath, name), uid, gid, follow_symlinks=False)
 
     def ensure_kube_dir(self):
         kube_dir = self.user_home / ".kube"
-        run(["mkdir", "-p", str(kube_dir)], check=False)
-        run(["chown", "-R", f"{self.user}:{self.user}", str(kube_dir)], check=False)
-        run(["chmod", "700", str(kube_dir)], check=False)
+        try:
+            kube_dir.mkdir(parents=True, exist_ok=True)
+            os.chmod(kube_dir, 0o700)
+        except OSError as e:
+            log.warning("Could not prepare %s: %s", kube_dir, e)
+            return
+        try:
+            self.chown_to_user(kube_dir, recursive=True)
+        except (OSError, KeyError) as e:
+            log.warning("Could not chown %s to %s: %s", kube_dir, self.user, e)
 
     def kube_env(self) -> dict:
-        e = os.environ.copy()
-        e["KUBECONFIG"] = str(self.kubeconfig_path)
-        return e
+        # Built once in __init__; callers only pass it through to subprocess, never mutate it.
+        return self._kube_env
+
+def node_ready(node) -> bool:
+    return any(c.type == "Ready" and c.status == "True" for c in (node.status.conditions or []))
+
+def watch_until(list_fn, done, timeout_sec: int, **kwargs) -> Optional[dict]:
+    """List objects from list_fn, then watch them until done(objects) is true.
+
+    objects maps name -> object and always holds the complete current set: it is seeded
+    from a full listing and the watch resumes from that listing's resourceVersion, so
+    each event is a real change rather than a replay. The API server pushes changes,
+    so this returns (the final objects) as soon as the condition flips, or None on timeout.
+    Connection errors (e.g. API server still starting), expired resourceVersions (410) and
+    5xx responses are retried with exponential backoff; other API errors give up with None.
+    """
+    deadline = time.time() + timeout_sec
+    delay = 1
+    while True:
+        remaining = int(deadline - time.time())
+        if remaining <= 0:
+            return None
+        w = k8s_watch.Watch()
+        try:
+            resp = list_fn(_request_timeout=remaining, **kwargs)
+            objects = {o.metadata.name: o for o in resp.items}
+            if done(objects):
+                return objects
+            for event in w.stream(list_fn, resource_version=resp.metadata.resource_version,
+                                  timeout_seconds=remaining, **kwargs):
+                obj = event["object"]
+                if event["type"] == "ERROR":
+                    # raw Status dict; 410 means our resourceVersion expired and we must re-list
+                    raise ApiException(status=obj.get("code"), reason=obj.get("message"))
+                if event["type"] == "DELETED":
+                    objects.pop(obj.metadata.name, None)
+                else:
+                    objects[obj.metadata.name] = obj
+                if done(objects):
+                    w.stop()
+                    return objects
+        except ApiException as e:
+            if e.status != 410 and (e.status or 0) < 500:
+                log.warning("Kubernetes API error while waiting: %s %s", e.status, e.reason)
+                return None
+            log.warning("Kubernetes API error %s (%s); retrying in %ss", e.status, e.reason, delay)
+        except urllib3.exceptions.HTTPError as e:
+            log.warning("Kubernetes API unreachable (%s); retrying in %ss", e, delay)
+        time.sleep(min(delay, max(deadline - time.time(), 0)))
+        delay = min(delay * 2, 16)
 
 class K3sCluster:
     def __init__(self, h: HostEnv):
         self.h = h
 
     def ensure_hosts(self):
-        hostname = subprocess.run(["hostname"], text=True, capture_output=True).stdout.strip()
+        name = detect_hostname()
         ip = self.h.primary_ip or "127.0.1.1"
-        Log.info(f"Checking /etc/hosts entry for {hostname} ({ip})")
-        grep_cmd = ["grep", "-Eq", rf"^[0-9A-Fa-f:.]+\s+{hostname}(\s|$)", "/etc/hosts"]
-        if subprocess.run(grep_cmd, check=False).returncode != 0:
-            line = f"{ip} {hostname}"
-            Log.info(f"Adding: {line}")
-            run(["bash", "-c", f"echo '{line}' >> /etc/hosts"], check=False)
+        log.info("Checking /etc/hosts entry for %s (%s)", name, ip)
+        hosts = Path("/etc/hosts")
+        pat = re.compile(rf"^[0-9A-Fa-f:.]+[ \t]+(?:[^\s#]+[ \t]+)*{re.escape(name)}(\s|$)", re.M)
+        text = hosts.read_text() if hosts.exists() else ""
+        if not pat.search(text):
+            line = f"{ip} {name}"
+            log.info("Adding: %s", line)
+            try:
+                with open(hosts, "a") as f:
+                    f.write(("" if not text or text.endswith("\n") else "\n") + line + "\n")
+            except OSError as e:
+                log.error("Failed to update /etc/hosts: %s", e)
         else:
-            Log.info("Host entry already present.")
+            log.info("Host entry already present.")
 
     def install_or_verify(self):
         kcfg = Path("/etc/rancher/k3s/k3s.yaml")
         if subprocess.run(["systemctl", "is-active", "--quiet", "k3s"], check=False).returncode == 0 and kcfg.exists():
-            Log.info("k3s server already active.")
+            log.info("k3s server already active.")
         else:
-            Log.info("Installing K3s server (traefik disabled)...")
-            run(["bash", "-lc", "curl -sfL https://get.k3s.io | INSTALL_K3S_EXEC='server --disable traefik' sh -"], check=True)
+            log.info("Installing K3s server (traefik disabled)...")
+            run_installer("https://get.k3s.io", "sh", sha256_env="K3S_INSTALL_SHA256",
+                          env={**os.environ, "INSTALL_K3S_EXEC": "server --disable traefik"})
 
-        Log.info("Waiting for K3s kubeconfig...")
-        for _ in range(60):
-            if kcfg.exists():
-                break
-            time.sleep(2)
-        else:
-            Log.error("Timed out waiting for /etc/rancher/k3s/k3s.yaml")
+        log.info("Waiting for K3s kubeconfig...")
+        if not wait_for_file(kcfg, 120):
+            log.error("Timed out waiting for /etc/rancher/k3s/k3s.yaml")
             sys.exit(1)
 
         self._fix_kubeconfig_permissions()
@@ -133,72 +320,111 @@ class K3sCluster:
     def _fix_kubeconfig_permissions(self):
         k3s_cfg = Path("/etc/rancher/k3s/k3s.yaml")
         if not k3s_cfg.exists():
-            Log.error("kubeconfig not found, skipping copy.")
+            log.error("kubeconfig not found, skipping copy.")
             return
         self.h.ensure_kube_dir()
         dest = self.h.kubeconfig_path
-        run(["cp", str(k3s_cfg), str(dest)], check=False)
-        run(["chown", "-R", f"{self.h.user}:{self.h.user}", str(dest.parent)], check=False)
-        run(["chmod", "600", str(dest)], check=False)
-        Log.info(f"Kubeconfig copied to {dest}")
+        try:
+            shutil.copyfile(k3s_cfg, dest)
+            os.chmod(dest, 0o600)
+        except OSError as e:
+            log.error("Failed to install kubeconfig at %s: %s", dest, e)
+            return
+        log.info("Kubeconfig copied to %s", dest)
+        try:
+            self.h.chown_to_user(dest)
+        except (OSError, KeyError) as e:
+            log.warning("Could not chown %s to %s: %s", dest, self.h.user, e)
 
     def _wait_nodes_ready(self):
-        Log.info("Checking node readiness (2 min timeout)...")
-        for _ in range(60):
-            result = subprocess.run(
-                ["k3s", "kubectl", "get", "nodes", "--no-headers"],
-                text=True, capture_output=True
-            )
-            lines = result.stdout.strip().splitlines()
-            total = len(lines)
-            ready = sum(1 for l in lines if "Ready" in l)
-            if total > 0 and ready == total:
-                Log.success(f"All {ready}/{total} nodes Ready.")
+        log.info("Checking node readiness (2 min timeout)...")
+        api = self.h.core_api
+        if api is not None:
+            def all_ready(nodes: dict) -> bool:
+                return bool(nodes) and all(node_ready(n) for n in nodes.values())
+
+            nodes = watch_until(api.list_node, all_ready, 120)
+            if nodes is not None:
+                log.log(SUCCESS, "All %d/%d nodes Ready.", len(nodes), len(nodes))
+                return
+            log.warning("Nodes not fully ready after 2 minutes. Continue verifying with `kubectl get nodes`.")
+            return
+
+        # `kubectl wait` watches server-side; it only fails fast when no node has registered yet.
+        deadline = time.time() + 120
+        while (remaining := int(deadline - time.time())) > 0:
+            r = run(["k3s", "kubectl", "wait", "--for=condition=Ready", "node", "--all", f"--timeout={remaining}s"],
+                    check=False)
+            if r.returncode == 0:
+                log.log(SUCCESS, "All nodes Ready.")
                 return
             time.sleep(2)
-        Log.warn("Nodes not fully ready after 2 minutes. Continue verifying with `kubectl get nodes`.")
+        log.warning("Nodes not fully ready after 2 minutes. Continue verifying with `kubectl get nodes`.")
 
     def ensure_kubectl(self):
-        if shutil.which("kubectl"):
-            Log.info("kubectl already present in PATH.")
+        if which("kubectl"):
+            log.info("kubectl already present in PATH.")
             return
-        if not shutil.which("k3s"):
-            Log.warn("k3s binary not found; cannot create kubectl shim.")
+        if not which("k3s"):
+            log.warning("k3s binary not found; cannot create kubectl shim.")
             return
         target_path = Path("/usr/local/bin/kubectl")
         if not target_path.exists():
-            Log.info("Creating kubectl shim using 'k3s kubectl' ...")
+            log.info("Creating kubectl shim using 'k3s kubectl' ...")
             shim_contents = "#!/bin/sh\nexec k3s kubectl \"$@\"\n"
             try:
                 with open(target_path, "w") as f:
                     f.write(shim_contents)
                 os.chmod(target_path, 0o755)
-                Log.success(f"kubectl shim created at {target_path}")
+                which.cache_clear()
+                log.log(SUCCESS, "kubectl shim created at %s", target_path)
             except Exception as e:
-                Log.error(f"Failed to create kubectl shim: {e}")
+                log.error("Failed to create kubectl shim: %s", e)
 
     def apply_bootstrap_yaml(self):
         tmpl = Path(__file__).resolve().parent / "templates" / "bootstrap.yaml"
         if tmpl.exists():
-            Log.info(f"Applying {tmpl}")
+            log.info("Applying %s", tmpl)
             run(["kubectl", "apply", "-f", str(tmpl)], check=False, env=self.h.kube_env())
         else:
-            Log.info("No bootstrap.yaml found; skipping.")
-
-    def ensure_helm(self):
-        if shutil.which("helm"):
-            Log.info("helm present.")
-            return
-        Log.info("Installing helm (get-helm-3)...")
-        run(["bash", "-lc", "curl -fsSL https://raw.githubusercontent.com/helm/helm/main/scripts/get-helm-3 | bash"], check=True)
-        if not shutil.which("helm"):
-            Log.error("helm not found after install attempt.")
+            log.info("No bootstrap.yaml found; skipping.")
+
+    def ensure_helm(self, capture: bool = False) -> str:
+        """Install helm if missing; returns the installer output when capture=True."""
+        if which("helm"):
+            log.info("helm present.")
+            return ""
+        log.info("Installing helm (get-helm-3)...")
+        r = run_installer("https://raw.githubusercontent.com/helm/helm/main/scripts/get-helm-3", "bash",
+                          sha256_env="HELM_INSTALL_SHA256", capture=capture)
+        which.cache_clear()
+        output = (r.stdout or "") + (r.stderr or "") if capture else ""
+        if not which("helm"):
+            # the installer's output is the only clue to why; don't drop it when it was captured
+            sys.stdout.write(output)
+            log.error("helm not found after install attempt.")
             sys.exit(2)
+        return output
 
 class RancherDeployment:
     def __init__(self, h: HostEnv):
         self.h = h
 
+    def _release_exists(self) -> bool:
+        # Helm v3 stores each release revision as a Secret labelled owner=helm,name=<release>.
+        api = self.h.core_api
+        if api is not None:
+            try:
+                # limit=1: each revision's secret carries the full release payload; we only need yes/no
+                return bool(api.list_namespaced_secret("cattle-system", label_selector="owner=helm,name=rancher",
+                                                       limit=1).items)
+            except Exception as e:
+                log.warning("Could not query helm release secrets (%s); falling back to helm status.", e)
+        return subprocess.run(
+            ["helm", "status", "rancher", "-n", "cattle-system"],
+            capture_output=True, env=self.h.kube_env(), check=False
+        ).returncode == 0
+
     def install(self):
         ip = self.h.primary_ip
         # HTTPS only: use NodePort 30444 (assuming bootstrap.yaml defines it)
@@ -206,21 +432,17 @@ class RancherDeployment:
         hostname = f"{ip}.nip.io"
         env = self.h.kube_env()
 
-        Log.info("Checking if Rancher helm release already exists (skip install if present)...")
-        status_cp = subprocess.run([
-            "helm", "status", "rancher", "-n", "cattle-system"
-        ], text=True, capture_output=True, env=env, check=False)
-        if status_cp.returncode == 0:
-            Log.info("Rancher helm release already present; skipping install/upgrade per request.")
+        log.info("Checking if Rancher helm release already exists (skip install if present)...")
+        if self._release_exists():
+            log.info("Rancher helm release already present; skipping install/upgrade per request.")
             return
 
-        Log.info("Rancher release not found; proceeding with initial install (no cert-manager)...")
-        run(["helm", "repo", "add", "rancher-stable", "https://releases.rancher.com/server-charts/stable"], check=False)
-        run(["helm", "repo", "update"], check=False)
-
+        log.info("Rancher release not found; proceeding with initial install (no cert-manager)...")
+        # --repo resolves the chart straight from the index: no `helm repo add/update` processes needed
         helm_cmd = [
             "helm", "--kubeconfig", str(self.h.kubeconfig_path),
-            "upgrade", "--install", "rancher", "rancher-stable/rancher",
+            "upgrade", "--install", "rancher", "rancher",
+            "--repo", "https://releases.rancher.com/server-charts/stable",
             "--namespace", "cattle-system",
             "--create-namespace",
             "--set", "replicas=1",
@@ -236,55 +458,67 @@ class RancherDeployment:
         run(helm_cmd, check=True, env=env)
 
     def wait_ready(self, timeout_sec: int = 300):
-        env = self.h.kube_env()
-        Log.info("Waiting for Rancher to be ready...")
-        try:
-            run(["kubectl", "-n", "cattle-system", "rollout", "status", "deploy/rancher", f"--timeout={timeout_sec}s"],
-                check=True, env=env)
-            Log.success("Rancher deployment is ready.")
-            return
-        except subprocess.CalledProcessError:
-            Log.warn("rollout status timed out; checking pods directly...")
-
-        deadline = time.time() + timeout_sec
-        while time.time() < deadline:
-            r = subprocess.run(
-                ["kubectl", "-n", "cattle-system", "get", "pods", "-l", "app=rancher",
-                 "-o", "jsonpath={range .items[*]}{.status.phase}{\"\\n\"}{end}"],
-                text=True, capture_output=True, env=env, check=False
-            )
-            phases = [p.strip() for p in (r.stdout or "").splitlines() if p.strip()]
-            if phases and all(p == "Running" for p in phases):
-                Log.success("Rancher pods are Running.")
-                return
-            time.sleep(3)
-        Log.warn("Rancher not ready within timeout; check with: kubectl -n cattle-system get pods")
+        log.info("Waiting for Rancher to be ready...")
+        apps = self.h.apps_api
+        if apps is not None:
+            def rolled_out(deployments: dict) -> bool:
+                return any(bool(d.status.ready_replicas) and d.status.ready_replicas == d.status.replicas
+                           for d in deployments.values())
+
+            ready = watch_until(apps.list_namespaced_deployment, rolled_out, timeout_sec,
+                                namespace="cattle-system", field_selector="metadata.name=rancher") is not None
+        else:
+            ready = run(["kubectl", "-n", "cattle-system", "wait", "--for=condition=Available", "deploy/rancher",
+                         f"--timeout={timeout_sec}s"], check=False, env=self.h.kube_env()).returncode == 0
+        if ready:
+            log.log(SUCCESS, "Rancher deployment is ready.")
+        else:
+            log.warning("Rancher not ready within timeout; check with: kubectl -n cattle-system get pods")
 
 class ClusterBanner:
     def __init__(self, h: HostEnv):
         self.h = h
 
     def verify_cluster(self):
-        Log.section("Cluster Verification")
+        section("Cluster Verification")
+        api = self.h.core_api
+        if api is not None:
+            try:
+                nodes = api.list_node().items
+            except Exception as e:
+                log.warning("Could not list nodes: %s", e)
+                nodes = []
+            for n in nodes:
+                status = "Ready" if node_ready(n) else "NotReady"
+                print(f"{n.metadata.name:<24} {status:<9} {n.status.node_info.kubelet_version}")
+            if nodes and all(node_ready(n) for n in nodes):
+                log.log(SUCCESS, "Cluster appears healthy and responsive.")
+            else:
+                log.warning("Cluster not fully ready, check systemctl status k3s and logs.")
+            return
+
         env = self.h.kube_env()
         result = run(["kubectl", "get", "nodes"], check=False, capture=True, env=env)
-        print(result.stdout or Log.warn("Could not get nodes output"))
+        if result.stdout:
+            print(result.stdout)
+        else:
+            log.warning("Could not get nodes output")
         if result.stdout and "Ready" in result.stdout:
-            Log.success("Cluster appears healthy and responsive.")
+            log.log(SUCCESS, "Cluster appears healthy and responsive.")
         else:
-            Log.warn("Cluster not fully ready, check systemctl status k3s and logs.")
+            log.warning("Cluster not fully ready, check systemctl status k3s and logs.")
 
     def access(self):
         ip = self.h.primary_ip
-        Log.section("Rancher Access")
+        section("Rancher Access")
         # Only HTTPS printed now
-        Log.info(f"HTTPS Endpoint : https://{ip}:30444")
-        Log.info("Namespace      : cattle-system")
-        Log.info("NodePort Svc    : rancher-nodeport")
+        log.info("HTTPS Endpoint : https://%s:30444", ip)
+        log.info("Namespace      : cattle-system")
+        log.info("NodePort Svc    : rancher-nodeport")
 
     def final(self):
-        Log.section("Bootstrap Complete")
-        Log.info(f"You can now run: KUBECONFIG={self.h.kubeconfig_path} kubectl -n cattle-system get pods")
+        section("Bootstrap Complete")
+        log.info("You can now run: KUBECONFIG=%s kubectl -n cattle-system get pods", self.h.kubeconfig_path)
 
 class BootstrapOrchestrator:
     def __init__(self):
@@ -295,23 +529,41 @@ class BootstrapOrchestrator:
 
     def require_sudo(self):
         if os.geteuid() != 0:
-            Log.error("This script must be run as root (sudo). Exiting.")
+            log.error("This script must be run as root (sudo). Exiting.")
             sys.exit(1)
 
+    @staticmethod
+    def _join_helm(helm):
+        """Print the buffered helm installer output; exit if the install failed."""
+        try:
+            output = helm.result()
+        except subprocess.CalledProcessError as e:
+            sys.stdout.write((e.stdout or "") + (e.stderr or ""))
+            log.error("helm installer failed (exit %s).", e.returncode)
+            sys.exit(2)
+        if output:
+            sys.stdout.write(output)
+
     def show_mode(self):
-        Log.section("K3s Cluster Bootstrap")
-        Log.info(f"Current user : {self.h.user}")
-        Log.info(f"Home dir     : {self.h.user_home}")
-        Log.info(f"Host IP      : {self.h.primary_ip}")
+        section("K3s Cluster Bootstrap")
+        log.info("Current user : %s", self.h.user)
+        log.info("Home dir     : %s", self.h.user_home)
+        log.info("Host IP      : %s", self.h.primary_ip)
 
     def run(self):
         self.require_sudo()
         self.show_mode()
         self.cluster.ensure_hosts()
-        self.cluster.install_or_verify()
-        self.cluster.ensure_kubectl()
-        self.cluster.apply_bootstrap_yaml()
-        self.cluster.ensure_helm()
+        # The helm download is independent of K3s; overlap it with the K3s install and readiness wait.
+        # Its installer output is buffered so it doesn't interleave with the K3s installer's.
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            helm = ex.submit(self.cluster.ensure_helm, capture=True)
+            self.cluster.install_or_verify()
+            if helm.done() and helm.exception() is not None:
+                self._join_helm(helm)
+            self.cluster.ensure_kubectl()
+            self.cluster.apply_bootstrap_yaml()
+            self._join_helm(helm)
         self.rancher.install()
         self.rancher.wait_ready()
         self.banner.verify_cluster()
@@ -319,6 +571,7 @@ class BootstrapOrchestrator:
         self.banner.final()
 
 def main():
+    configure_logging()
     orchestrator = BootstrapOrchestrator()
     orchestrator.run()
 